@@ -1,22 +1,334 @@
 """Main MCP server with interactive follow-up question tool."""
 
-import json
+import asyncio
+import itertools
 import os
+import socket
 import sys
 import tempfile
-import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
 from pathlib import Path
 from typing import Optional
 
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
+import orjson
 from fastmcp import FastMCP
 
+# Resolve the launcher once at import time; a per-call import re-acquires
+# the import lock even on cache hits.
+try:
+    from copilot_followup_mcp.terminal_launcher import launch_terminal_prompt
+
+    _LAUNCH_IMPORT_ERROR = None
+except ImportError as _e:
+    launch_terminal_prompt = None
+    _LAUNCH_IMPORT_ERROR = _e
+
 # Initialize FastMCP server
 mcp = FastMCP("copilot-followup")
 
 
+def _j(obj) -> str:
+    """Serialize a response payload with orjson."""
+    return orjson.dumps(obj).decode()
+
+
+def _err(error: str, **fields) -> str:
+    """Build an error response payload."""
+    return _j({"error": error, **fields})
+
+
+# Resolved once: tempdir resolution stats several candidates on first use,
+# and pid never changes. A counter keeps per-call addresses unique.
+_TMPDIR = Path(tempfile.gettempdir())
+_PID = os.getpid()
+_ADDRESS_COUNTER = itertools.count()
+
+
+def _make_address() -> str:
+    """Build a unique rendezvous address for the terminal helper."""
+    if os.name == "nt":
+        return rf"\\.\pipe\followup_{_PID}_{next(_ADDRESS_COUNTER)}"
+    return str(_TMPDIR / f"followup_{_PID}_{next(_ADDRESS_COUNTER)}.sock")
+
+
+# Fully-static error payloads, serialized once at import time.
+_ERR_LAUNCH_FAIL = _j(
+    {
+        "error": "Failed to launch terminal. Please ensure you have terminal access.",
+        "fallback_message": "Unable to get user input. Assuming 'Continue' as default response.",
+    }
+)
+_ERR_TERMINAL_CLOSED = _j(
+    {
+        "error": "Terminal closed without response",
+        "message": "The terminal window was closed before a response was provided. You can skip this follow-up question and continue with the task, or ask again if needed.",
+        "suggestion": "Skip this follow-up and proceed with the current task.",
+    }
+)
+_ERR_CANCELLED = _j(
+    {
+        "error": "cancelled",
+        "message": "User cancelled the follow-up question by closing the terminal or not selecting an option. You can skip this follow-up and continue with the task.",
+    }
+)
+
+
+def _parse_timeout() -> "tuple[Optional[float], str]":
+    """Parse FOLLOWUP_TIMEOUT_MINUTES into (seconds, human label).
+
+    Values below 1 (or None seconds) mean wait forever; anything else is
+    clamped to 24 hours. Malformed values fall back to 5 minutes.
+    """
+    raw_timeout = os.getenv("FOLLOWUP_TIMEOUT_MINUTES")
+    timeout_minutes: Optional[float]
+    if raw_timeout is None:
+        timeout_minutes = 5.0
+    else:
+        try:
+            parsed = float(raw_timeout)
+            if parsed < 1:
+                timeout_minutes = None
+            else:
+                timeout_minutes = min(parsed, 1440.0)
+        except ValueError:
+            timeout_minutes = 5.0
+
+    if timeout_minutes is None:
+        return None, "infinite"
+    return timeout_minutes * 60, f"{timeout_minutes:g} minute(s)"
+
+
+# Parsed once: env vars do not change mid-process.
+_TIMEOUT_SECONDS, _TIMEOUT_LABEL = _parse_timeout()
+
+
+def refresh_timeout() -> None:
+    """Re-read FOLLOWUP_TIMEOUT_MINUTES (for tests / hot reload)."""
+    global _TIMEOUT_SECONDS, _TIMEOUT_LABEL
+    _TIMEOUT_SECONDS, _TIMEOUT_LABEL = _parse_timeout()
+
+
+def _close_listener(listener) -> None:
+    """Close the rendezvous endpoint, waking a still-blocked acceptor.
+
+    Listener.close() does not interrupt a thread blocked in accept(), so
+    a timed-out or cancelled batch would leak that executor thread
+    forever. Poke it with a bare connect-and-close first: a blocked
+    acceptor wakes, sees EOF mid-handshake and returns. A full Client
+    would deadlock here when no accept is pending, waiting for an
+    authkey challenge nobody sends.
+    """
+    try:
+        if os.name == "nt":
+            open(listener.address, "rb").close()
+        else:
+            with socket.socket(socket.AF_UNIX) as s:
+                s.settimeout(1)
+                s.connect(listener.address)
+    except OSError:
+        pass
+    listener.close()
+
+
+def _recv_result(listener, prompts):
+    """Hand the helper its prompts and receive its result payload.
+
+    The prompt data travels over the connection rather than inside the
+    helper's source, so the child source stays constant per address.
+    Connections that fail the authkey challenge are dropped and the
+    wait continues.
+    """
+    while True:
+        try:
+            with listener.accept() as conn:
+                conn.send(prompts)
+                return conn.recv()
+        except AuthenticationError:
+            continue
+        except (OSError, EOFError):
+            return None
+
+
+def _map_response(value) -> str:
+    """Translate one helper answer into a tool response string."""
+    if value is None:
+        return _ERR_CANCELLED
+    if not isinstance(value, str):
+        return _err(
+            "Invalid response type",
+            message=f"Expected a string response, got {type(value).__name__}",
+        )
+    return value
+
+
+async def _batch_abandoned(futures: "list[asyncio.Future]") -> None:
+    """Complete once every caller in the batch has gone away (cancelled).
+
+    Watches the futures through done-callbacks only: it must never own
+    them, or cancelling this watcher would cancel the callers' futures
+    before the batch result could be delivered.
+    """
+    all_done = asyncio.Event()
+    remaining = len(futures)
+
+    def _one_done(_future: "asyncio.Future") -> None:
+        nonlocal remaining
+        remaining -= 1
+        if not remaining:
+            all_done.set()
+
+    for future in futures:
+        future.add_done_callback(_one_done)
+    try:
+        await all_done.wait()
+    finally:
+        for future in futures:
+            future.remove_done_callback(_one_done)
+
+
+async def _run_batch(
+    prompts: "list[tuple[str, list[str]]]",
+    futures: "list[asyncio.Future]",
+) -> "list[str]":
+    """Launch one terminal for a batch of prompts and collect the answers.
+
+    Returns one response string per prompt: the user's answer, or a
+    serialized error payload for prompts that were not answered.
+    """
+    # Open the rendezvous endpoint before launching so the helper can
+    # never connect into the void. The per-batch authkey keeps other
+    # local processes from talking to the listener: recv() unpickles,
+    # so an unauthenticated endpoint would hand arbitrary code
+    # execution to whoever connects first.
+    authkey = os.urandom(16)
+    listener = Listener(_make_address(), authkey=authkey)
+
+    # Launch terminal off the event loop: writing the helper script and
+    # spawning the process are blocking syscalls.
+    terminal_process = await asyncio.to_thread(
+        launch_terminal_prompt,
+        address=listener.address,
+        authkey=authkey,
+        title="Follow-up Question",
+    )
+
+    if not terminal_process:
+        _close_listener(listener)
+        return [_ERR_LAUNCH_FAIL] * len(prompts)
+
+    # Wait for the helper to connect and send its results, racing against
+    # the terminal process exiting and the configured timeout.
+    result_task = asyncio.create_task(
+        asyncio.to_thread(_recv_result, listener, prompts)
+    )
+    proc_task = asyncio.create_task(asyncio.to_thread(terminal_process.wait))
+    abort_task = asyncio.create_task(_batch_abandoned(futures))
+    try:
+        completed, _ = await asyncio.wait(
+            {result_task, proc_task, abort_task},
+            timeout=_TIMEOUT_SECONDS,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+
+        if abort_task in completed and result_task not in completed:
+            # Every caller cancelled (client disconnect); tear the terminal
+            # down immediately instead of leaving it until the timeout.
+            if terminal_process.poll() is None:
+                try:
+                    terminal_process.terminate()
+                except Exception:
+                    pass
+            return [_ERR_CANCELLED] * len(prompts)
+
+        if result_task not in completed and proc_task in completed:
+            # Terminal exited first; allow a moment for the results to
+            # arrive before declaring the prompts abandoned.
+            completed, _ = await asyncio.wait({result_task}, timeout=1)
+            if result_task not in completed:
+                # Process ended without producing a response
+                return [_ERR_TERMINAL_CLOSED] * len(prompts)
+
+        if result_task not in completed:
+            # Timeout reached
+            # Try to terminate the process gracefully
+            if terminal_process.poll() is None:
+                try:
+                    terminal_process.terminate()
+                except Exception:
+                    pass
+
+            timeout_error = _err(
+                "User did not respond",
+                message="No response was received within the configured timeout. The user may have closed the terminal window or not responded. You can either skip this question and continue, or ask the question again if needed.",
+                timeout=_TIMEOUT_LABEL,
+                suggestion="Skip this follow-up and continue with the task, or rephrase and retry the question.",
+            )
+            return [timeout_error] * len(prompts)
+
+        result = result_task.result()
+    finally:
+        # Wake any still-pending accept thread, then remove the socket.
+        _close_listener(listener)
+        for task in (result_task, proc_task, abort_task):
+            if not task.done():
+                task.cancel()
+
+    if result is None:
+        result = {}
+    answers = result.get("results") or []
+
+    # Prompts the script failed on (or never reached) get an error payload
+    if "error" in result:
+        unanswered = _err(
+            "Script execution failed",
+            message=f"The interactive prompt encountered an error: {result['error']}",
+            suggestion="Try again or check the terminal for more details.",
+        )
+    else:
+        unanswered = _ERR_TERMINAL_CLOSED
+
+    return [
+        _map_response(answers[i]) if i < len(answers) else unanswered
+        for i in range(len(prompts))
+    ]
+
+
+# Coalescing of concurrent tool calls: calls that arrive within the batch
+# window share one terminal session instead of each spawning their own.
+_BATCH_WINDOW = 0.05  # seconds
+_pending: "list[tuple[asyncio.Future, str, list[str]]]" = []
+_flush_scheduled = False
+
+
+async def _flush_pending() -> None:
+    """Run the queued prompts as one batch and resolve their futures."""
+    global _flush_scheduled
+    _flush_scheduled = False
+    batch = _pending[:]
+    _pending.clear()
+    if not batch:
+        return
+
+    prompts = [(question, options) for _, question, options in batch]
+    try:
+        responses = await _run_batch(prompts, [future for future, _, _ in batch])
+    except Exception as e:
+        responses = [
+            _err(
+                f"Unexpected error: {str(e)}",
+                message="An error occurred while processing the follow-up question",
+            )
+        ] * len(batch)
+
+    for (future, _, _), response in zip(batch, responses):
+        if not future.done():
+            future.set_result(response)
+
+
 @mcp.tool()
 async def ask_followup_question(question: str, options: list[str]) -> str:
     """
@@ -55,161 +367,41 @@ async def ask_followup_question(question: str, options: list[str]) -> str:
         str: User's response
     """
     try:
-        # Import here to avoid issues if not installed
-        from copilot_followup_mcp.terminal_launcher import launch_terminal_prompt
-
-        # Create temporary output file
-        output_file = (
-            Path(tempfile.gettempdir())
-            / f"followup_output_{os.getpid()}_{time.time()}.json"
-        )
-
-        # Remove old output file if it exists
-        if output_file.exists():
-            output_file.unlink()
+        if launch_terminal_prompt is None:
+            return _err(
+                f"Missing dependencies: {_LAUNCH_IMPORT_ERROR}",
+                message="Please install required packages: pip install prompt-toolkit psutil",
+            )
 
         # Ensure we have valid options
         if not options:
             options = ["Continue", "Make changes", "Finish"]
 
-        # Configure timeout from environment (minutes). <1 means wait forever.
-        raw_timeout = os.getenv("FOLLOWUP_TIMEOUT_MINUTES")
-        timeout_minutes: Optional[float]
-        if raw_timeout is None:
-            timeout_minutes = 5.0
-        else:
-            try:
-                parsed = float(raw_timeout)
-                if parsed < 1:
-                    timeout_minutes = None
-                else:
-                    timeout_minutes = min(parsed, 1440.0)
-            except ValueError:
-                timeout_minutes = 5.0
-
-        timeout_seconds = None if timeout_minutes is None else timeout_minutes * 60
-
-        # Launch terminal
-        terminal_process = launch_terminal_prompt(
-            question=question,
-            options=options,
-            output_file=output_file,
-            title="Follow-up Question",
-        )
-
-        if not terminal_process:
-            return json.dumps(
-                {
-                    "error": "Failed to launch terminal. Please ensure you have terminal access.",
-                    "fallback_message": "Unable to get user input. Assuming 'Continue' as default response.",
-                }
+        # Queue the question and let the coalescer batch it with any other
+        # calls made in the same turn into a single terminal session.
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        _pending.append((future, question, options))
+
+        global _flush_scheduled
+        if not _flush_scheduled:
+            _flush_scheduled = True
+            loop.call_later(
+                _BATCH_WINDOW, lambda: asyncio.ensure_future(_flush_pending())
             )
 
-        # Wait for user response with process monitoring
-        start_time = time.time()
-        check_interval = 0.5  # Check every 0.5 seconds
-        grace_period = 3  # Allow 3 seconds for process to stabilize
-
-        while not output_file.exists() and (
-            timeout_seconds is None or time.time() - start_time < timeout_seconds
-        ):
-            # Check if the terminal process has ended after grace period
-            if time.time() - start_time > grace_period:
-                if terminal_process.poll() is not None:
-                    # Process has ended, wait a bit for the file to be written
-                    time.sleep(1)
-                    if output_file.exists():
-                        break
-
-                    # Process ended without producing a response
-                    return json.dumps(
-                        {
-                            "error": "Terminal closed without response",
-                            "message": "The terminal window was closed before a response was provided. You can skip this follow-up question and continue with the task, or ask again if needed.",
-                            "suggestion": "Skip this follow-up and proceed with the current task.",
-                        }
-                    )
-
-            time.sleep(check_interval)
-
-        if not output_file.exists():
-            # Timeout reached
-            # Try to terminate the process gracefully
-            if terminal_process and terminal_process.poll() is None:
-                try:
-                    terminal_process.terminate()
-                except Exception:
-                    pass
-
-            configured_timeout = (
-                "infinite"
-                if timeout_minutes is None
-                else f"{timeout_minutes:g} minute(s)"
-            )
-            return json.dumps(
-                {
-                    "error": "User did not respond",
-                    "message": "No response was received within the configured timeout. The user may have closed the terminal window or not responded. You can either skip this question and continue, or ask the question again if needed.",
-                    "timeout": configured_timeout,
-                    "suggestion": "Skip this follow-up and continue with the task, or rephrase and retry the question.",
-                }
-            )
-
-        # Read result
         try:
-            with open(output_file, "r", encoding="utf-8") as f:
-                result = json.load(f)
-
-            # Check if script reported an error
-            if "error" in result:
-                return json.dumps(
-                    {
-                        "error": "Script execution failed",
-                        "message": f"The interactive prompt encountered an error: {result['error']}",
-                        "suggestion": "Try again or check the terminal for more details.",
-                    }
-                )
-
-            user_response = result.get("result")
-
-            # Clean up output file
-            try:
-                output_file.unlink()
-            except Exception:
-                pass
-
-            if user_response is None:
-                return json.dumps(
-                    {
-                        "error": "cancelled",
-                        "message": "User cancelled the follow-up question by closing the terminal or not selecting an option. You can skip this follow-up and continue with the task.",
-                    }
-                )
-
-            # On success, return the raw string only (no JSON wrapper)
-            return str(user_response)
-
-        except json.JSONDecodeError as e:
-            return json.dumps(
-                {
-                    "error": f"Failed to parse response: {str(e)}",
-                    "message": "Invalid response format",
-                }
-            )
+            return await future
+        except asyncio.CancelledError:
+            # Client disconnected before an answer arrived; drop the queued
+            # question so a later flush does not still ask it.
+            _pending[:] = [item for item in _pending if item[0] is not future]
+            raise
 
-    except ImportError as e:
-        return json.dumps(
-            {
-                "error": f"Missing dependencies: {str(e)}",
-                "message": "Please install required packages: pip install prompt-toolkit psutil",
-            }
-        )
     except Exception as e:
-        return json.dumps(
-            {
-                "error": f"Unexpected error: {str(e)}",
-                "message": "An error occurred while processing the follow-up question",
-            }
+        return _err(
+            f"Unexpected error: {str(e)}",
+            message="An error occurred while processing the follow-up question",
         )
 
 
@@ -1,20 +1,74 @@
 """Interactive CLI module for follow-up questions with dynamic UI."""
 
+import functools
 import os
 import shutil
 import sys
+import textwrap
 from typing import List, Optional, Tuple
 
-from prompt_toolkit import Application
-from prompt_toolkit.filters import Condition
-from prompt_toolkit.formatted_text import HTML, FormattedText
-from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.layout import FormattedTextControl, HSplit, Layout, VSplit, Window
-from prompt_toolkit.layout.containers import ConditionalContainer, Container, DynamicContainer
-from prompt_toolkit.layout.dimension import Dimension
-from prompt_toolkit.styles import Style
-from prompt_toolkit.widgets import TextArea, Frame
-from prompt_toolkit.cursor_shapes import CursorShape
+# prompt_toolkit is imported lazily inside the methods that need it: the
+# import costs a noticeable slice of the helper's cold start, and callers
+# that only import this module should not pay it.
+
+
+@functools.lru_cache(maxsize=32)
+def _borders(width: int, selected: bool) -> Tuple[str, str, str]:
+    """Return the (top, bottom, vertical) border strings for a box."""
+    if selected:
+        return (
+            "┏" + "━" * (width - 2) + "┓",
+            "┗" + "━" * (width - 2) + "┛",
+            "┃",
+        )
+    return (
+        "╭" + "─" * (width - 2) + "╮",
+        "╰" + "─" * (width - 2) + "╯",
+        "│",
+    )
+
+
+# Style class names interned once so every fragment tuple shares the
+# same string objects and prompt_toolkit's style lookups stay on the
+# identity fast path
+_CLS_QUESTION = sys.intern("class:question")
+_CLS_OPTION = sys.intern("class:option")
+_CLS_ARROW = sys.intern("class:arrow")
+_CLS_SELECTED = sys.intern("class:selected")
+_CLS_HINT = sys.intern("class:hint")
+_CLS_SUCCESS = sys.intern("class:success-box")
+
+# Hint text shared by every prompt; wrapped per instance to the width
+_HINT_TEXT = "↑↓ Navigate  •  Enter Select  •  Tab Toggle  •  F2 Edit  •  Ctrl+C Cancel"
+_BLANK_TUPLE = ("", "\n")
+
+# Compiled style shared by every prompt in the process. Built lazily so
+# importing this module still does not pull in prompt_toolkit.
+_STYLE = None
+
+
+def _get_style() -> "Style":
+    """Return the application style, compiling it on first use."""
+    global _STYLE
+    if _STYLE is None:
+        from prompt_toolkit.styles import Style
+
+        _STYLE = Style.from_dict(
+            {
+                "question": "bold #61afef",           # Softer blue
+                "option": "#abb2bf",                   # Light gray
+                "selected": "bold #98c379",            # Green
+                "arrow": "bold #e5c07b",               # Gold arrow
+                "textbox-frame": "#5c6370",
+                "textbox-active": "#98c379 bold",
+                "hint": "#5c6370 italic",              # Muted gray
+                "success-box": "bold #98c379",
+                "input-label": "#5c6370",
+                "input-label-active": "bold #98c379",
+                "input-active": "bold #98c379",
+            }
+        )
+    return _STYLE
 
 
 class InteractiveFollowUpCLI:
@@ -30,68 +84,141 @@ class InteractiveFollowUpCLI:
         """
         self.question = question
         self.options = options if options else []
+        # Initial width for pre-run wrapping; while the app runs the
+        # render path keeps it in sync via _refresh_width
+        self._terminal_width = self._read_terminal_width()
+        # Everything is pre-wrapped to the terminal width so the content
+        # window does not need prompt_toolkit's per-frame wrap pass
+        self._build_wrapped_fragments()
         self.selected_index = 0
         self.focus_on_textbox = False
         self.highlight_options = True  # Start highlighted; disable once user types
         self.result: Optional[str] = None
         self.submitted = False
         self.submission_type: Optional[str] = None  # 'option' or 'custom'
+
+        from prompt_toolkit.layout.dimension import Dimension
+        from prompt_toolkit.widgets import TextArea
+
+        # Height grows with the cached line count (see
+        # _get_text_area_height); the callable is re-evaluated per layout
+        # pass without rescanning the document
+        self._line_count = 1
         self.text_area = TextArea(
             prompt="",
             multiline=True,
             wrap_lines=True,
             scrollbar=False,
             focusable=True,
-            height=Dimension(min=1, max=20),
+            height=lambda: Dimension(min=1, max=self._get_text_area_height()),
         )
         # If user types directly, stop highlighting options
         self.text_area.buffer.on_text_insert += self._handle_text_insert
+        # Track the line count per edit instead of rescanning per render
+        self.text_area.buffer.on_text_changed += self._handle_text_changed
+        # Rendered content cache; prompt_toolkit calls the render callback
+        # on every redraw, so skip rebuilding when nothing visible changed
+        self._render_cache_key: Optional[Tuple] = None
+        self._render_cache_val = None
+        self._submitted_cache_key: Optional[Tuple] = None
+        self._submitted_cache_val = None
 
     def _handle_text_insert(self, _event=None) -> None:
         """When user types, remove option highlighting and focus text box."""
         self.highlight_options = False
         self.focus_on_textbox = True
 
+    def _handle_text_changed(self, _event=None) -> None:
+        """Keep the cached line count in sync with the buffer."""
+        self._line_count = self.text_area.document.line_count
+
     def _get_text_area_height(self) -> int:
         """Calculate dynamic height based on content (1-5 lines)."""
-        text = self.text_area.text
-        if not text:
-            return 1
-        line_count = text.count('\n') + 1
-        return min(max(1, line_count), 5)
-
-    def _get_terminal_width(self) -> int:
-        """Get the current terminal width."""
+        return min(max(1, self._line_count), 5)
+
+    @staticmethod
+    def _read_terminal_width() -> int:
+        """Query the current terminal width."""
         try:
             return shutil.get_terminal_size().columns
         except Exception:
             return 80  # Default fallback
 
+    def _build_wrapped_fragments(self) -> None:
+        """(Re)wrap all width-dependent fragments to the terminal width.
+
+        Covers the question, both styled variants of every option row
+        and the hint line, so nothing is clipped on narrow terminals.
+        """
+        width = max(20, self._terminal_width - 2)
+        wrapped_question = textwrap.fill(self.question, width=width)
+        self._question_tuple = (_CLS_QUESTION, f"\n{wrapped_question}\n\n")
+        # Continuation lines align under the option text
+        body_width = max(10, width - 4)
+        bodies = [
+            "\n    ".join(textwrap.wrap(opt, width=body_width) or [""])
+            for opt in self.options
+        ]
+        self._option_rows = [(_CLS_OPTION, f"    {body}\n") for body in bodies]
+        self._selected_rows = [
+            [(_CLS_OPTION, "  "), (_CLS_ARROW, "➤ "), (_CLS_SELECTED, f"{body}\n")]
+            for body in bodies
+        ]
+        self._hint_tuple = (
+            _CLS_HINT,
+            textwrap.fill(
+                _HINT_TEXT, width=width, initial_indent="  ", subsequent_indent="  "
+            )
+            + "\n",
+        )
+
+    def _refresh_width(self) -> None:
+        """Sync the cached width with the running application's output.
+
+        prompt_toolkit installs its own SIGWINCH handler while the app
+        runs, so a process-level handler would never fire. Resizes
+        trigger a repaint, and this runs on every repaint: one size
+        query per redraw, with the wrapped fragments rebuilt only when
+        the width actually changed.
+        """
+        from prompt_toolkit.application.current import get_app
+
+        try:
+            width = get_app().output.get_size().columns
+        except Exception:
+            return
+        if width > 0 and width != self._terminal_width:
+            self._terminal_width = width
+            self._build_wrapped_fragments()
+            self._render_cache_key = None
+            self._submitted_cache_key = None
+
     def _create_success_box(self, text: str) -> List[Tuple[str, str]]:
         """Create a success box with the selected/submitted text."""
-        terminal_width = self._get_terminal_width()
-        box_width = min(terminal_width - 4, max(len(text) + 6, 40))
+        box_width = min(self._terminal_width - 4, max(len(text) + 6, 40))
         inner_width = box_width - 4
         
-        lines = []
-        for line in text.split('\n'):
-            while len(line) > inner_width:
-                lines.append(line[:inner_width])
-                line = line[inner_width:]
-            lines.append(line)
+        lines = [
+            line[k : k + inner_width]
+            for line in text.split('\n')
+            for k in range(0, max(len(line), 1), inner_width)
+        ]
         
+        # One rule string shared by the three horizontal borders
+        rule = "─" * (box_width - 2)
+
         result = []
-        result.append(("class:success-box", "\n"))
-        result.append(("class:success-box", "  ╭" + "─" * (box_width - 2) + "╮\n"))
-        result.append(("class:success-box", "  │" + " ✓ Selected ".center(box_width - 2) + "│\n"))
-        result.append(("class:success-box", "  ├" + "─" * (box_width - 2) + "┤\n"))
-        
+        result.append((_CLS_SUCCESS, "\n"))
+        result.append((_CLS_SUCCESS, f"  ╭{rule}╮\n"))
+        result.append((_CLS_SUCCESS, "  │" + " ✓ Selected ".center(box_width - 2) + "│\n"))
+        result.append((_CLS_SUCCESS, f"  ├{rule}┤\n"))
+
         for line in lines:
             padded = f" {line}".ljust(box_width - 2)
-            result.append(("class:success-box", f"  │{padded}│\n"))
-        
-        result.append(("class:success-box", "  ╰" + "─" * (box_width - 2) + "╯\n"))
-        
+            result.append((_CLS_SUCCESS, f"  │{padded}│\n"))
+
+        result.append((_CLS_SUCCESS, f"  ╰{rule}╯\n"))
+
         return result
 
     def _create_box(self, text: str, width: int, selected: bool = False) -> List[str]:
@@ -102,84 +229,75 @@ class InteractiveFollowUpCLI:
         inner_width = width - 4  # Account for borders and padding
 
         # Wrap text if it's too long
-        wrapped_lines = []
-        words = text.split()
-        current_line = ""
-
-        for word in words:
-            if len(current_line) + len(word) + 1 <= inner_width:
-                current_line += (" " if current_line else "") + word
-            else:
-                if current_line:
-                    wrapped_lines.append(current_line)
-                current_line = word
-
-        if current_line:
-            wrapped_lines.append(current_line)
-
-        if not wrapped_lines:
-            wrapped_lines = [""]
+        wrapped_lines = textwrap.wrap(text, width=inner_width) or [""]
 
         # Create box
-        top_left = "╭" if not selected else "┏"
-        top_right = "╮" if not selected else "┓"
-        bottom_left = "╰" if not selected else "┗"
-        bottom_right = "╯" if not selected else "┛"
-        horizontal = "─" if not selected else "━"
-        vertical = "│" if not selected else "┃"
-
-        lines = []
-        lines.append(top_left + horizontal * (width - 2) + top_right)
-
-        for line in wrapped_lines:
-            padded_line = line.ljust(inner_width)
-            lines.append(f"{vertical} {padded_line} {vertical}")
-
-        lines.append(bottom_left + horizontal * (width - 2) + bottom_right)
+        top, bottom, vertical = _borders(width, selected)
 
-        return lines
+        return [
+            top,
+            *(f"{vertical} {line:<{inner_width}} {vertical}" for line in wrapped_lines),
+            bottom,
+        ]
 
-    def _render_content(self) -> FormattedText:
+    def _render_content(self) -> "FormattedText":
         """Render the main content."""
-        terminal_width = self._get_terminal_width()
-        content = []
+        from prompt_toolkit.formatted_text import FormattedText
 
-        # Display question
-        content.append(("class:question", f"\n{self.question}\n\n"))
+        key = (self.selected_index, self.highlight_options)
+        if key == self._render_cache_key:
+            return self._render_cache_val
 
-        # Display options with rounded appearance
-        if self.options:
-            for idx, option in enumerate(self.options):
-                is_selected = idx == self.selected_index and self.highlight_options
-                if is_selected:
-                    # Selected option with arrow and color
-                    content.append(("class:option", "  "))
-                    content.append(("class:arrow", "➤ "))
-                    content.append(("class:selected", f"{option}\n"))
-                else:
-                    # Normal option
-                    content.append(("class:option", f"    {option}\n"))
-
-        content.append(("", "\n"))
-
-        # Display hints
-        hints = "↑↓ Navigate  •  Enter Select  •  Tab Toggle  •  F2 Edit  •  Ctrl+C Cancel"
-        content.append(("class:hint", f"  {hints}\n"))
+        # Options rendered with rounded appearance; the selected row is the
+        # multi-fragment arrow variant
+        self._render_cache_key = key
+        self._render_cache_val = FormattedText(
+            [
+                self._question_tuple,
+                *(
+                    fragment
+                    for idx, row in enumerate(self._option_rows)
+                    for fragment in (
+                        self._selected_rows[idx]
+                        if idx == self.selected_index and self.highlight_options
+                        else (row,)
+                    )
+                ),
+                _BLANK_TUPLE,
+                self._hint_tuple,
+                _BLANK_TUPLE,
+            ]
+        )
+        return self._render_cache_val
 
-        content.append(("", "\n"))
+    def _render_submitted_content(self) -> "FormattedText":
+        """Render the submitted state with green success box."""
+        from prompt_toolkit.formatted_text import FormattedText
 
-        return FormattedText(content)
+        key = (self.result, self._terminal_width)
+        if key == self._submitted_cache_key:
+            return self._submitted_cache_val
 
-    def _render_submitted_content(self) -> FormattedText:
-        """Render the submitted state with green success box."""
-        content = []
-        content.append(("class:question", f"\n{self.question}\n\n"))
-        content.extend(self._create_success_box(self.result or ""))
-        return FormattedText(content)
+        self._submitted_cache_key = key
+        self._submitted_cache_val = FormattedText(
+            [self._question_tuple, *self._create_success_box(self.result or "")]
+        )
+        return self._submitted_cache_val
 
-    def _create_layout(self) -> Layout:
+    def _create_layout(self) -> "Layout":
         """Create the application layout."""
+        from prompt_toolkit.layout import (
+            FormattedTextControl,
+            HSplit,
+            Layout,
+            Window,
+        )
+        from prompt_toolkit.filters import Condition
+        from prompt_toolkit.layout.containers import ConditionalContainer
+        from prompt_toolkit.widgets import Frame
+
         def get_content():
+            self._refresh_width()
             if self.submitted:
                 return self._render_submitted_content()
             return self._render_content()
@@ -189,34 +307,40 @@ class InteractiveFollowUpCLI:
             focusable=False,
         )
 
+        # Content is pre-wrapped (question in __init__, boxes in their
+        # builders), so skip prompt_toolkit's per-frame wrap pass
         content_window = Window(
             content=content_control,
-            wrap_lines=True,
+            wrap_lines=False,
         )
 
-        # Always render the text input inside a frame so the box stays visible and full-width
-        def get_text_frame():
-            if self.submitted:
-                return Window(height=0)
-            style = "class:textbox-active" if self.focus_on_textbox else "class:textbox-frame"
-            return Frame(
-                body=self.text_area,
-                style=style,
-            )
-
-        text_frame = DynamicContainer(get_text_frame)
+        # Two statically styled Frames built once for the whole session,
+        # selected by filters (Frame itself only accepts a plain-string
+        # style), so no container is rebuilt per repaint; both vanish
+        # after submission
+        active_frame = ConditionalContainer(
+            content=Frame(body=self.text_area, style="class:textbox-active"),
+            filter=Condition(lambda: self.focus_on_textbox and not self.submitted),
+        )
+        inactive_frame = ConditionalContainer(
+            content=Frame(body=self.text_area, style="class:textbox-frame"),
+            filter=Condition(lambda: not self.focus_on_textbox and not self.submitted),
+        )
 
         root_container = HSplit(
             [
                 content_window,
-                text_frame,
+                active_frame,
+                inactive_frame,
             ]
         )
 
         return Layout(root_container)
 
-    def _create_key_bindings(self) -> KeyBindings:
+    def _create_key_bindings(self) -> "KeyBindings":
         """Create key bindings for the application."""
+        from prompt_toolkit.key_binding import KeyBindings
+
         kb = KeyBindings()
 
         @kb.add("up")
@@ -227,8 +351,10 @@ class InteractiveFollowUpCLI:
             if self.focus_on_textbox:
                 event.app.current_buffer.cursor_up()
             elif self.options and self.highlight_options:
-                self.selected_index = (self.selected_index - 1) % len(self.options)
-                event.app.invalidate()
+                new_index = (self.selected_index - 1) % len(self.options)
+                if new_index != self.selected_index:
+                    self.selected_index = new_index
+                    event.app.invalidate()
 
         @kb.add("down")
         def _down(event):
@@ -238,8 +364,10 @@ class InteractiveFollowUpCLI:
             if self.focus_on_textbox:
                 event.app.current_buffer.cursor_down()
             elif self.options and self.highlight_options:
-                self.selected_index = (self.selected_index + 1) % len(self.options)
-                event.app.invalidate()
+                new_index = (self.selected_index + 1) % len(self.options)
+                if new_index != self.selected_index:
+                    self.selected_index = new_index
+                    event.app.invalidate()
 
         @kb.add("tab")
         def _tab(event):
@@ -277,19 +405,17 @@ class InteractiveFollowUpCLI:
                 self.result = self.text_area.text.strip()
                 self.submission_type = 'custom'
                 self.submitted = True
+                # Repaint with the success box, then exit shortly after
+                # without blocking the event loop
                 event.app.invalidate()
-                import time
-                time.sleep(0.3)
-                event.app.exit()
+                event.app.loop.call_later(0.3, event.app.exit)
             elif not self.focus_on_textbox and self.options:
                 if 0 <= self.selected_index < len(self.options):
                     self.result = self.options[self.selected_index]
                     self.submission_type = 'option'
                     self.submitted = True
                     event.app.invalidate()
-                    import time
-                    time.sleep(0.3)
-                    event.app.exit()
+                    event.app.loop.call_later(0.3, event.app.exit)
 
         @kb.add("c-c")
         def _cancel(event):
@@ -301,25 +427,15 @@ class InteractiveFollowUpCLI:
 
     def run(self) -> Optional[str]:
         """Run the interactive CLI and return the user's choice."""
+        from prompt_toolkit import Application
+
         # Create application
         app = Application(
             layout=self._create_layout(),
             key_bindings=self._create_key_bindings(),
             full_screen=False,
             mouse_support=False,
-            style=Style.from_dict({
-                "question": "bold #61afef",           # Softer blue
-                "option": "#abb2bf",                   # Light gray
-                "selected": "bold #98c379",            # Green
-                "arrow": "bold #e5c07b",               # Gold arrow
-                "textbox-frame": "#5c6370",
-                "textbox-active": "#98c379 bold",
-                "hint": "#5c6370 italic",              # Muted gray
-                "success-box": "bold #98c379",
-                "input-label": "#5c6370",
-                "input-label-active": "bold #98c379",
-                "input-active": "bold #98c379",
-            }),
+            style=_get_style(),
         )
 
         try:
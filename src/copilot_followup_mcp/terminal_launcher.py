@@ -1,289 +1,366 @@
 """Terminal launcher module for opening terminals in VSCode or OS fallback."""
 
+import atexit
+import itertools
 import os
 import platform
+import shlex
+import signal
 import subprocess
 import sys
 import tempfile
-from pathlib import Path
 from typing import Optional
 
 
-def create_terminal_script(python_code: str) -> Path:
+# platform.system() issues a uname() call on POSIX; the answer never
+# changes mid-process, so resolve it once at import
+_SYSTEM = platform.system()
+
+
+# Linux emulator detection is done once per process: a single PATH sweep
+# instead of a failed execve per missing terminal on every call.
+# Each entry builds the argv for the winning emulator; some accept an argv
+# after a separator flag, the rest want a single shell-quoted string.
+_LINUX_TERMINAL_ARGV = {
+    "gnome-terminal": lambda exe, code, cmd: ["gnome-terminal", "--", exe, "-c", code],
+    "konsole": lambda exe, code, cmd: ["konsole", "-e", exe, "-c", code],
+    "xfce4-terminal": lambda exe, code, cmd: ["xfce4-terminal", "-e", cmd],
+    "xterm": lambda exe, code, cmd: ["xterm", "-e", exe, "-c", code],
+    "terminator": lambda exe, code, cmd: ["terminator", "-e", cmd],
+    "x-terminal-emulator": lambda exe, code, cmd: ["x-terminal-emulator", "-e", cmd],
+}
+_detected_terminal: Optional[str] = None
+
+
+class _SpawnedProcess:
+    """Minimal Popen-compatible handle for a posix_spawn'd child.
+
+    wait() runs in a worker thread while the event loop may poll() or
+    terminate() concurrently; whichever waitpid loses that race gets
+    ECHILD, which is treated as "already reaped" (returncode 0), the
+    same assumption subprocess.Popen makes internally.
     """
-    Create a temporary script file that will run the interactive CLI.
 
-    Args:
-        python_code: The Python code to execute
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode: Optional[int] = None
 
-    Returns:
-        Path to the temporary script file
+    def wait(self) -> int:
+        if self.returncode is None:
+            try:
+                _, status = os.waitpid(self.pid, 0)
+            except ChildProcessError:
+                self.returncode = 0
+                return self.returncode
+            self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                self.returncode = 0
+                return self.returncode
+            if pid:
+                self.returncode = os.waitstatus_to_exitcode(status)
+        return self.returncode
+
+    def terminate(self) -> None:
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def _spawn(argv: "list[str]", env: "Optional[dict]" = None):
+    """Start a detached child with stdout/stderr silenced.
+
+    Uses os.posix_spawnp where available, which avoids the fork()
+    page-table copy that makes Popen spawns slow from a large-RSS
+    parent. The call sites need no cwd/preexec hooks, and since PEP 446
+    our fds are non-inheritable across exec, so nothing from Popen's
+    close_fds scan is lost.
     """
-    system = platform.system()
-
-    if system == "Windows":
-        # Create a .py file for Windows
-        fd, temp_path = tempfile.mkstemp(suffix=".py", prefix="followup_", text=True)
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            f.write(python_code)
-            f.write("\n")
-    else:
-        # Create a .py file for Unix-like systems
-        fd, temp_path = tempfile.mkstemp(suffix=".py", prefix="followup_", text=True)
-        with os.fdopen(fd, "w", encoding="utf-8") as f:
-            f.write(python_code)
-            f.write("\n")
+    spawn_env = os.environ if env is None else env
+    if hasattr(os, "posix_spawnp"):
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        try:
+            pid = os.posix_spawnp(
+                argv[0],
+                argv,
+                spawn_env,
+                file_actions=[
+                    (os.POSIX_SPAWN_DUP2, devnull, 1),
+                    (os.POSIX_SPAWN_DUP2, devnull, 2),
+                ],
+                setsid=True,
+            )
+        except NotImplementedError:
+            # Platform lacks POSIX_SPAWN_SETSID; take the Popen path
+            pass
+        else:
+            return _SpawnedProcess(pid)
+        finally:
+            os.close(devnull)
+    return subprocess.Popen(
+        argv,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        start_new_session=True,
+        env=spawn_env,
+    )
 
-    return Path(temp_path)
 
+def _find_linux_terminal() -> Optional[str]:
+    """Return the first installed terminal emulator, cached per process.
 
-def open_os_terminal(script_path: Path, title: str = "Follow-up Question", close_terminal: bool = True) -> Optional[subprocess.Popen]:
+    One listdir sweep over $PATH finds every candidate at once, instead
+    of a full shutil.which scan (a stat per directory) per name.
+    """
+    global _detected_terminal
+    if _detected_terminal is None:
+        candidates = set(_LINUX_TERMINAL_ARGV)
+        found = set()
+        for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+            if not directory:
+                continue
+            try:
+                entries = os.listdir(directory)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry in candidates and entry not in found:
+                    if os.access(os.path.join(directory, entry), os.X_OK):
+                        found.add(entry)
+        # Preference follows the table order, not PATH order
+        for name in _LINUX_TERMINAL_ARGV:
+            if name in found:
+                _detected_terminal = name
+                break
+    return _detected_terminal
+
+
+# Scripts live in one private per-session directory, removed in full at
+# interpreter exit; the old per-prompt mkstemp files were never cleaned
+# up on the success path and accumulated in /tmp.
+_temp_dir: Optional[tempfile.TemporaryDirectory] = None
+_script_counter = itertools.count()
+
+
+def _get_temp_dir() -> str:
+    """Create the session temp directory on first use."""
+    global _temp_dir
+    if _temp_dir is None:
+        _temp_dir = tempfile.TemporaryDirectory(prefix="followup_")
+        atexit.register(_temp_dir.cleanup)
+    return _temp_dir.name
+
+
+def create_terminal_script(python_code: str) -> str:
     """
-    Open a new terminal in the OS and run the script.
+    Create a temporary script file that will run the interactive CLI.
 
     Args:
-        script_path: Path to the script to run
-        title: Title for the terminal
+        python_code: The Python code to execute
 
     Returns:
-        Process handle if successful, None otherwise
+        Path to the temporary script file, as a plain string
     """
-    system = platform.system()
-    python_exe = sys.executable
-
+    # The directory is 0o700 and private to this session, so a plain
+    # counter-named file needs no mkstemp security dance
+    temp_path = os.path.join(_get_temp_dir(), f"script_{next(_script_counter)}.py")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    # Write the raw bytes directly; no TextIOWrapper/BufferedWriter
+    # layering for a one-shot few-KB payload
     try:
-        if system == "Windows":
-            # Prefer launching PowerShell directly so we have a stable process handle
-            try:
-                ps_command = f"& '{python_exe}' '{script_path}'"
-                if close_terminal:
-                    proc = subprocess.Popen(
-                        [
-                            "powershell.exe",
-                            "-Command",
-                            ps_command,
-                        ],
-                        creationflags=subprocess.CREATE_NEW_CONSOLE,
-                    )
-                else:
-                    proc = subprocess.Popen(
-                        [
-                            "powershell.exe",
-                            "-NoExit",
-                            "-Command",
-                            ps_command,
-                        ],
-                        creationflags=subprocess.CREATE_NEW_CONSOLE,
-                    )
-                return proc
-            except (FileNotFoundError, OSError):
-                pass
+        os.write(fd, python_code.encode("utf-8") + b"\n")
+    finally:
+        os.close(fd)
 
-            # Fallback to cmd
-            # For cmd, we need to wrap the entire command in quotes and escape internal quotes
-            if close_terminal:
-                cmd_command = f'""{python_exe}" "{script_path}""'
-                proc = subprocess.Popen(
-                    [
-                        "cmd.exe",
-                        "/C",
-                        cmd_command,
-                    ],
-                    creationflags=subprocess.CREATE_NEW_CONSOLE,
-                )
-            else:
-                cmd_command = f'""{python_exe}" "{script_path}" && pause"'
-                proc = subprocess.Popen(
-                    [
-                        "cmd.exe",
-                        "/K",
-                        cmd_command,
-                    ],
-                    creationflags=subprocess.CREATE_NEW_CONSOLE,
-                )
-            return proc
+    return temp_path
 
-        elif system == "Darwin":  # macOS
-            # Use AppleScript to open Terminal.app or iTerm2
-            if close_terminal:
-                script_content = f"""
-tell application "Terminal"
-    activate
-    do script "cd '{script_path.parent}' && '{python_exe}' '{script_path}'"
-end tell
-"""
-            else:
-                script_content = f"""
+
+def _open_windows(python_code: str, extra_env: "Optional[dict]" = None):
+    python_exe = sys.executable
+    # No handles are redirected to the child, so skip Popen's fd-closing
+    # bookkeeping entirely (see bpo-8052 for the cost of the default scan)
+    return subprocess.Popen(
+        [python_exe, "-c", python_code],
+        creationflags=subprocess.CREATE_NEW_CONSOLE,
+        close_fds=False,
+        env={**os.environ, **extra_env} if extra_env else None,
+    )
+
+
+def _open_darwin(python_code: str, extra_env: "Optional[dict]" = None):
+    # Use AppleScript to open Terminal.app. Terminal.app runs the
+    # command with its own environment, not osascript's, so anything in
+    # extra_env has to travel inside the script file instead (the file
+    # is 0600 inside the 0o700 session directory, so it stays private).
+    python_exe = sys.executable
+    if extra_env:
+        exports = "import os\n" + "".join(
+            f"os.environ[{key!r}] = {value!r}\n"
+            for key, value in extra_env.items()
+        )
+        python_code = exports + python_code
+    script_path = create_terminal_script(python_code)
+    # Quote for the shell first, then escape for the AppleScript string
+    # literal, so paths with spaces or quotes survive both layers
+    shell_cmd = f"{shlex.quote(python_exe)} {shlex.quote(script_path)}"
+    applescript_cmd = shell_cmd.replace("\\", "\\\\").replace('"', '\\"')
+    script_content = f"""
 tell application "Terminal"
     activate
-    do script "cd '{script_path.parent}' && '{python_exe}' '{script_path}' && echo '\\nPress any key to close...' && read -n 1"
+    do script "{applescript_cmd}"
 end tell
 """
-            proc = subprocess.Popen(
-                ["osascript", "-e", script_content],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            return proc
-
-        else:  # Linux and other Unix-like systems
-            # Try various terminal emulators
-            terminals = [
-                [
-                    "gnome-terminal",
-                    "--",
-                    "bash",
-                    "-c",
-                    f'"{python_exe}" "{script_path}"; echo "\nPress Enter to close..."; read',
-                ],
-                [
-                    "konsole",
-                    "-e",
-                    "bash",
-                    "-c",
-                    f'"{python_exe}" "{script_path}"; echo "\nPress Enter to close..."; read',
-                ],
-                [
-                    "xfce4-terminal",
-                    "-e",
-                    f'bash -c ""{python_exe}" "{script_path}"; echo \\"\\nPress Enter to close...\\"; read"',
-                ],
-                [
-                    "xterm",
-                    "-e",
-                    f'bash -c ""{python_exe}" "{script_path}"; echo \\"\\nPress Enter to close...\\"; read"',
-                ],
-                [
-                    "terminator",
-                    "-e",
-                    f'bash -c ""{python_exe}" "{script_path}"; echo \\"\\nPress Enter to close...\\"; read"',
-                ],
-            ]
+    return _spawn(["osascript", "-e", script_content])
 
-            for terminal_cmd in terminals:
-                try:
-                    if close_terminal:
-                        proc = subprocess.Popen(
-                            [
-                                terminal_cmd[0],
-                                "-e",
-                                f'bash -c ""{python_exe}" "{script_path}""',
-                            ],
-                            stdout=subprocess.DEVNULL,
-                            stderr=subprocess.DEVNULL,
-                        )
-                    else:
-                        proc = subprocess.Popen(
-                            [
-                                terminal_cmd[0],
-                                "-e",
-                                f'bash -c ""{python_exe}" "{script_path}"; echo \\"\\nPress Enter to close...\\"; read"',
-                            ],
-                            stdout=subprocess.DEVNULL,
-                            stderr=subprocess.DEVNULL,
-                        )
-                    return proc
-                except (FileNotFoundError, OSError):
-                    continue
-
-            # If no terminal emulator found, fall back to x-terminal-emulator
-            try:
-                proc = subprocess.Popen(
-                    [
-                        "x-terminal-emulator",
-                        "-e",
-                        f'bash -c ""{python_exe}" "{script_path}"; echo \\"\\nPress Enter to close...\\"; read"',
-                    ],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                )
-                return proc
-            except (FileNotFoundError, OSError):
-                pass
 
+def _open_linux(python_code: str, extra_env: "Optional[dict]" = None):
+    terminal = _find_linux_terminal()
+    if terminal is None:
         return None
 
+    python_exe = sys.executable
+    shell_cmd = f"{shlex.quote(python_exe)} -c {shlex.quote(python_code)}"
+    argv = _LINUX_TERMINAL_ARGV[terminal](python_exe, python_code, shell_cmd)
+    env = {**os.environ, **extra_env} if extra_env else None
+    return _spawn(argv, env)
+
+
+# The platform never changes mid-process: pick the opener once instead of
+# walking an if/elif chain per launch (other Unix-likes share the Linux path)
+_OPEN_TERMINAL = {"Windows": _open_windows, "Darwin": _open_darwin}.get(
+    _SYSTEM, _open_linux
+)
+
+
+def open_os_terminal(
+    python_code: str,
+    title: str = "Follow-up Question",
+    extra_env: "Optional[dict]" = None,
+) -> Optional[subprocess.Popen]:
+    """
+    Open a new terminal in the OS and run the given Python code.
+
+    The code is passed straight to `python -c`, so no temp script file
+    touches disk; macOS is the exception, where AppleScript's `do script`
+    takes a shell string and a temp script survives the quoting reliably.
+
+    Args:
+        python_code: The Python code to execute
+        title: Title for the terminal
+        extra_env: Extra environment variables for the helper process
+
+    Returns:
+        Process handle if successful, None otherwise
+    """
+    try:
+        return _OPEN_TERMINAL(python_code, extra_env)
     except Exception as e:
         print(f"Failed to open OS terminal: {e}", file=sys.stderr)
         return None
 
 
+# Helper source assembled per launch from this shared template; only the
+# rendezvous address varies between launches, the prompts themselves are
+# received over the connection rather than baked into the source
+_SRC_DIR_REPR = repr(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_HELPER_TEMPLATE = """
+import os
+import sys
+from multiprocessing.connection import Client
+
+sys.path.insert(0, {src_dir})
+
+from copilot_followup_mcp.interactive_cli import run_interactive_prompt
+
+authkey = bytes.fromhex(os.environ.pop('FOLLOWUP_AUTHKEY'))
+with Client({address}, authkey=authkey) as conn:
+    results = []
+    try:
+        for question, options in conn.recv():
+            results.append(run_interactive_prompt(question, options))
+        conn.send({{'results': results}})
+    except Exception as e:
+        conn.send({{'error': str(e), 'results': results}})
+"""
+
+
 def launch_terminal_prompt(
-    question: str,
-    options: list[str],
-    output_file: Path,
+    address: str,
+    authkey: bytes,
     title: str = "Follow-up Question",
 ) -> Optional[subprocess.Popen]:
-    """Launch OS terminal to display the interactive prompt."""
+    """Launch one OS terminal to run a batch of interactive prompts.
+
+    The helper connects back to `address` (a `multiprocessing.connection`
+    endpoint opened by the caller), authenticates with `authkey`,
+    receives the list of (question, options) pairs, asks each in order
+    and sends the collected answers back over the same connection — the
+    prompt data never rides in the child's argv or source. The authkey
+    travels in the helper's environment (or inside the private script
+    file on macOS), never in its ps-visible argv.
+    """
     close_terminal = os.getenv("CLOSE_TERMINAL", "true").lower() in ("true", "1", "yes")
-    
-    src_dir = Path(__file__).parent.parent
-    python_code = f"""
-import sys
-import json
-from pathlib import Path
 
-sys.path.insert(0, {repr(str(src_dir))})
+    python_code = _HELPER_TEMPLATE.format(
+        src_dir=_SRC_DIR_REPR,
+        address=repr(address),
+    )
 
-from copilot_followup_mcp.interactive_cli import run_interactive_prompt
+    if not close_terminal:
+        # Keep the window open from inside the helper itself, so every
+        # platform branch can run plain `python -c` with no shell wrapper
+        python_code += "\ninput('\\nPress Enter to close...')\n"
 
-try:
-    result = run_interactive_prompt({repr(question)}, {repr(options)})
-    with open({repr(str(output_file))}, 'w', encoding='utf-8') as f:
-        json.dump({{'result': result}}, f)
-except Exception as e:
-    with open({repr(str(output_file))}, 'w', encoding='utf-8') as f:
-        json.dump({{'error': str(e)}}, f)
-"""
-    
-    script_path = create_terminal_script(python_code)
-    
     try:
-        return open_os_terminal(script_path, title, close_terminal)
-    except Exception as e:
-        try:
-            script_path.unlink()
-        except:
-            pass
+        return open_os_terminal(
+            python_code, title, extra_env={"FOLLOWUP_AUTHKEY": authkey.hex()}
+        )
+    except Exception:
         return None
 
 
 if __name__ == "__main__":
     # Test the terminal launcher
-    import json
-    import tempfile
-    import time
-
-    output_file = Path(tempfile.gettempdir()) / "test_followup_output.json"
-
-    if output_file.exists():
-        output_file.unlink()
-
-    success = launch_terminal_prompt(
-        question="What would you like to do next?",
-        options=[
-            "Continue with the current approach",
-            "Try a different method",
-            "Finish and conclude",
-        ],
-        output_file=output_file,
-        title="Test Follow-up",
-    )
-
-    if success:
-        print("Terminal launched successfully. Waiting for response...")
-
-        # Wait for output file (with timeout)
-        timeout = 60
-        start_time = time.time()
-        while not output_file.exists() and time.time() - start_time < timeout:
-            time.sleep(0.5)
+    from multiprocessing.connection import Listener
 
-        if output_file.exists():
-            with open(output_file, "r", encoding="utf-8") as f:
-                result = json.load(f)
-            print(f"Result: {result}")
-        else:
-            print("Timeout waiting for response")
+    if os.name == "nt":
+        address = rf"\\.\pipe\test_followup_{os.getpid()}"
     else:
-        print("Failed to launch terminal")
+        address = os.path.join(
+            tempfile.gettempdir(), f"test_followup_{os.getpid()}.sock"
+        )
+
+    authkey = os.urandom(16)
+    with Listener(address, authkey=authkey) as listener:
+        success = launch_terminal_prompt(
+            address=listener.address,
+            authkey=authkey,
+            title="Test Follow-up",
+        )
+
+        if success:
+            print("Terminal launched successfully. Waiting for response...")
+            with listener.accept() as conn:
+                conn.send(
+                    [
+                        (
+                            "What would you like to do next?",
+                            [
+                                "Continue with the current approach",
+                                "Try a different method",
+                                "Finish and conclude",
+                            ],
+                        )
+                    ]
+                )
+                print(f"Result: {conn.recv()}")
+        else:
+            print("Failed to launch terminal")